@@ -33,9 +33,7 @@ class MailAnalyzer:
             s = re.sub(r'<[^>]+>', '', str(s))
             s = html.unescape(s)
             return s.strip()
-        def analyze_one(mail, idx):
-            summary = self.azure_client.generate_summary(mail['body'])
-            sentiment = self.azure_client.detect_sentiment(mail['body'])
+        def build_entry(mail, idx, summary):
             d = mail["date"]
             if isinstance(d, datetime):
                 dt = d.strftime("%Y-%m-%d %H:%M:%S%z")
@@ -64,24 +62,31 @@ class MailAnalyzer:
                 "cc": clean_text(mail["cc"]),
                 "subject": clean_text(mail["subject"]),
                 "summary": summary,
-                "sentiment": sentiment,
+                "sentiment": "",
                 "dialogue": dialogue_str,
                 "original_body": clean_text(mail["body"])
             }
-        results = []
-        dialogue = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            futures = [executor.submit(analyze_one, mail, idx) for idx, mail in enumerate(reversed(mail_thread), 1)]
-            for f in concurrent.futures.as_completed(futures):
-                res = f.result()
-                results.append(res)
-        # 保证按idx倒序排列
-        results = sorted(results, key=lambda x: x["idx"])
-        dialogue = [r["dialogue"] for r in results]
-        overall_summary = self.azure_client.generate_summary(
-            "\n\n".join([m["body"] for m in mail_thread])
-        )
-        reply_suggestions = self.generate_reply_suggestions(overall_summary)
+        # 按倒序编号，idx=1为最新一封
+        mails = list(enumerate(reversed(mail_thread), 1))
+        if not mails:
+            return {"timeline": [], "dialogue": [], "overall_summary": "", "reply_suggestions": []}
+        # 任务依赖：各邮件摘要并发执行；整体摘要只依赖各邮件摘要；回复建议只依赖整体摘要。
+        # 情绪分析不在关键路径上，以低优先级执行，只占用空闲的限流时间槽，不推迟整体摘要和回复建议。
+        def detect_sentiment(body):
+            with self.azure_client.low_priority():
+                return self.azure_client.detect_sentiment(body)
+        workers = max(1, min(self.azure_client.max_concurrency, 2 * len(mails)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            summary_futures = {idx: executor.submit(self.azure_client.generate_summary, mail['body'])
+                               for idx, mail in mails}
+            sentiment_futures = {idx: executor.submit(detect_sentiment, mail['body']) for idx, mail in mails}
+            results = [build_entry(mail, idx, summary_futures[idx].result()) for idx, mail in mails]
+            dialogue = [r["dialogue"] for r in results]
+            # 按时间正序拼接各邮件的对话描述（含发件人、时间），而不是重新读取全部正文
+            overall_summary = self.azure_client.generate_summary("\n".join(reversed(dialogue)))
+            reply_suggestions = self.generate_reply_suggestions(overall_summary)
+            for r in results:
+                r["sentiment"] = sentiment_futures[r["idx"]].result()
         return {
             "timeline": results,
             "dialogue": dialogue,
@@ -91,12 +96,22 @@ class MailAnalyzer:
 
     def generate_reply_suggestions(self, summary: str) -> list:
         styles = ["正式", "中性", "友好"]
-        suggestions = []
-        for style in styles:
-            prompt = f"请以{style}风格，基于以下内容，生成一段适合回复此邮件的建议：\n{summary}"
-            resp = self.azure_client._call_openai(prompt, 200)
-            suggestions.append(resp['choices'][0]['message']['content'])
-        return suggestions
+        # 一次调用同时生成三种风格，返回以风格为键的JSON对象
+        prompt = (
+            f"请基于以下内容，分别以{'、'.join(styles)}风格各生成一段适合回复此邮件的建议，"
+            f"只返回JSON对象，键为风格名（{'、'.join(styles)}），值为对应的回复建议：\n{summary}"
+        )
+        resp = self.azure_client._call_openai(prompt, 600, response_format={"type": "json_object"})
+        content = resp['choices'][0]['message']['content'].strip()
+        try:
+            # 兼容JSON前后带有说明文字或代码块标记的返回
+            data = json.loads(re.search(r'\{.*\}', content, re.S).group(0))
+        except Exception:
+            return [content]
+        # 优先按约定风格取值；键名不符时退而使用返回中的全部值
+        values = [data[style] for style in styles if data.get(style)] or list(data.values())
+        suggestions = [str(v).strip() for v in values if str(v).strip()]
+        return suggestions or [content]
 
     def _detect_risks(self, summary, entities, action_items):
         # 简单用OpenAI再分析风险点
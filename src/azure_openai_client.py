@@ -1,6 +1,9 @@
 import requests
 import time
 import json
+import math
+import threading
+from contextlib import contextmanager
 from typing import Dict, List
 from loguru import logger
 from src.utils import load_json
@@ -17,8 +20,37 @@ class AzureOpenAIClient:
         self.usage_log = self.config['cost_tracking']['log_path']
         self.last_request_time = 0
         self.interval = 60.0 / self.rpm
+        self._rate_lock = threading.Lock()
+        self._priority = threading.local()
+        # 并发数按限流器推算：一个典型请求往返（expected_latency秒）内限流器能放行的请求数
+        self.expected_latency = self.config['rate_limit'].get('expected_latency', 10)
+        self.max_concurrency = max(1, math.ceil(self.rpm * self.expected_latency / 60))
 
-    def _call_openai(self, prompt: str, max_tokens: int = 300) -> Dict:
+    @contextmanager
+    def low_priority(self):
+        """当前线程在此上下文中发出的请求只占用空闲的时间槽，不会推迟其他请求"""
+        self._priority.low = True
+        try:
+            yield
+        finally:
+            self._priority.low = False
+
+    def _wait_for_slot(self) -> None:
+        # 在锁内预约下一个请求时间槽，锁外等待，保证多线程下仍按rpm间隔发出请求；
+        # 低优先级请求从不提前预约，只在时间槽已到时占用，因此普通请求最多多等一个间隔
+        low = getattr(self._priority, 'low', False)
+        while True:
+            with self._rate_lock:
+                now = time.time()
+                slot = max(now, self.last_request_time + self.interval)
+                if not low or slot <= now:
+                    self.last_request_time = slot
+                    break
+            time.sleep(slot - now)
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _call_openai(self, prompt: str, max_tokens: int = 300, response_format: Dict = None) -> Dict:
         url = f"{self.endpoint}openai/deployments/{self.deployment}/chat/completions?api-version={self.api_version}"
         headers = {
             "api-key": self.api_key,
@@ -29,11 +61,10 @@ class AzureOpenAIClient:
             "max_tokens": max_tokens,
             "temperature": 0.2
         }
+        if response_format:
+            data["response_format"] = response_format
         for attempt in range(self.max_retries):
-            now = time.time()
-            if now - self.last_request_time < self.interval:
-                time.sleep(self.interval - (now - self.last_request_time))
-            self.last_request_time = time.time()
+            self._wait_for_slot()
             try:
                 resp = requests.post(url, headers=headers, json=data, timeout=30)
                 if resp.status_code == 200:
@@ -0,0 +1,31 @@
+import json
+import pytest
+from src import azure_openai_client
+from src.azure_openai_client import AzureOpenAIClient
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+    def json(self):
+        return {"choices": [{"message": {"content": self.content}}]}
+
+
+@pytest.fixture
+def stub_client(tmp_path, monkeypatch):
+    """返回客户端工厂：请求不发往Azure，而是以responder(请求体)的返回值作为模型输出"""
+    def make(responder, rpm=1200, expected_latency=10):
+        config = {
+            "azure_openai": {"endpoint": "https://test/", "api_key": "k", "api_version": "v", "deployment_name": "d"},
+            "rate_limit": {"rpm": rpm, "max_retries": 1, "expected_latency": expected_latency},
+            "cost_tracking": {"enabled": False, "log_path": str(tmp_path / "usage.log")}
+        }
+        path = tmp_path / "azure_config.json"
+        path.write_text(json.dumps(config), encoding="utf-8")
+        monkeypatch.setattr(azure_openai_client.requests, "post",
+                            lambda url, **kwargs: FakeResponse(responder(kwargs["json"])))
+        return AzureOpenAIClient(str(path))
+    return make
@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+from src.analyzer import MailAnalyzer
+
+REPLY = json.dumps({"正式": "a", "中性": "b", "友好": "c"}, ensure_ascii=False)
+
+
+def make_responder(events, reply_content=REPLY, latency=0.0):
+    """按提示词区分请求类型，记录发送顺序，并在整体摘要/单封摘要返回时记录完成事件"""
+    lock = threading.Lock()
+
+    def respond(body):
+        prompt = body["messages"][0]["content"]
+        if "情绪" in prompt:
+            kind, content = "sentiment", "中性"
+        elif "回复此邮件" in prompt:
+            kind, content = "reply", reply_content
+        elif "邮件提到" in prompt:
+            kind, content = "overall", "整体摘要"
+        else:
+            kind, content = "summary", "摘要-" + prompt.rsplit("\n", 1)[-1]
+        with lock:
+            events.append((kind, body))
+        time.sleep(latency)
+        if kind in ("summary", "overall"):
+            with lock:
+                events.append((kind + "_done", body))
+        return content
+    return respond
+
+
+def make_thread(n):
+    return [{
+        "body": f"正文{i}",
+        "date": f"2024-01-01 10:{i:02d}",
+        "from": f"发件人{i}",
+        "to": "", "cc": "", "subject": "主题"
+    } for i in range(n)]
+
+
+def test_analyze_conversation_task_graph(stub_client):
+    events = []
+    analyzer = MailAnalyzer(stub_client(make_responder(events)))
+    result = analyzer.analyze_conversation(make_thread(5))
+    # idx=1为最新一封邮件
+    assert [r["idx"] for r in result["timeline"]] == [1, 2, 3, 4, 5]
+    assert result["timeline"][0]["summary"] == "摘要-正文4"
+    assert all(r["sentiment"] == "中性" for r in result["timeline"])
+    # 整体摘要基于按时间正序排列的各邮件对话描述，而非原始正文
+    overall = next(body for kind, body in events if kind == "overall")
+    lines = overall["messages"][0]["content"].split("\n")[1:]
+    assert lines == [f"发件人{i}，在10:{i:02d}，邮件提到：摘要-正文{i}" for i in range(5)]
+    assert result["overall_summary"] == "整体摘要"
+    assert result["reply_suggestions"] == ["a", "b", "c"]
+    reply = next(body for kind, body in events if kind == "reply")
+    assert reply["response_format"] == {"type": "json_object"}
+    assert len([e for e in events if not e[0].endswith("_done")]) == 5 + 5 + 1 + 1
+
+
+def test_critical_path_not_queued_behind_sentiments(stub_client):
+    events = []
+    # 10封邮件、间隔50ms、往返100ms：若情绪分析提前预约时间槽，整体摘要和回复建议会排在其后
+    analyzer = MailAnalyzer(stub_client(make_responder(events, latency=0.1), rpm=1200))
+    analyzer.analyze_conversation(make_thread(10))
+    kinds = [kind for kind, _ in events]
+
+    def sentiments_between(start, end):
+        return kinds[kinds.index(start) + 1:kinds.index(end)].count("sentiment")
+    last_summary_done = len(kinds) - 1 - kinds[::-1].index("summary_done")
+    assert kinds[last_summary_done + 1:kinds.index("overall")].count("sentiment") <= 2
+    assert sentiments_between("overall_done", "reply") <= 2
+    assert kinds.count("sentiment") == 10
+
+
+def suggestions_for(stub_client, content):
+    return MailAnalyzer(stub_client(lambda body: content)).generate_reply_suggestions("摘要")
+
+
+def test_reply_suggestions_parsing(stub_client):
+    assert suggestions_for(stub_client, REPLY) == ["a", "b", "c"]
+    assert suggestions_for(stub_client, "```json\n" + REPLY + "\n```") == ["a", "b", "c"]
+    assert suggestions_for(stub_client, "以下是建议：" + REPLY) == ["a", "b", "c"]
+    # 缺少部分风格时只返回已有的风格
+    assert suggestions_for(stub_client, '{"正式": "a", "友好": "c"}') == ["a", "c"]
+    # 键名不符时使用全部值
+    assert suggestions_for(stub_client, '{"formal": "x", "friendly": "y"}') == ["x", "y"]
+    # 无法解析时原样返回
+    assert suggestions_for(stub_client, "直接回复即可") == ["直接回复即可"]
@@ -0,0 +1,81 @@
+import threading
+import time
+import pytest
+from src import azure_openai_client
+
+
+class FakeClock:
+    """替代客户端模块中的time：时钟不自行走动，sleep只记录等待时长"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.waits = []
+        self.lock = threading.Lock()
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.waits.append(seconds)
+
+
+def test_concurrent_calls_reserve_spaced_slots(stub_client, monkeypatch):
+    client = stub_client(lambda body: "ok")
+    clock = FakeClock()
+    monkeypatch.setattr(azure_openai_client, "time", clock)
+    threads = [threading.Thread(target=client._call_openai, args=("hi",)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 时钟静止时，8个并发请求依次预约 now, now+interval, ..., now+7*interval
+    assert sorted(clock.waits) == pytest.approx([k * client.interval for k in range(1, 8)])
+    assert client.last_request_time == pytest.approx(clock.now + 7 * client.interval)
+
+
+class BlockingClock(FakeClock):
+    """后台线程的sleep阻塞到release之后再推进时钟；主线程的sleep只记录等待时长"""
+
+    def __init__(self, now=1000.0):
+        super().__init__(now)
+        self.release = threading.Event()
+        self.blocked = 0
+
+    def sleep(self, seconds):
+        if threading.current_thread() is threading.main_thread():
+            return super().sleep(seconds)
+        with self.lock:
+            self.blocked += 1
+        self.release.wait()
+        with self.lock:
+            self.now += seconds
+
+
+def test_low_priority_calls_do_not_delay_normal_calls(stub_client, monkeypatch):
+    sent = []
+    client = stub_client(lambda body: sent.append(body["messages"][0]["content"]) or "ok")
+    clock = BlockingClock()
+    monkeypatch.setattr(azure_openai_client, "time", clock)
+    client.last_request_time = clock.now
+
+    def background():
+        with client.low_priority():
+            client._call_openai("bg")
+    threads = [threading.Thread(target=background, daemon=True) for _ in range(5)]
+    for t in threads:
+        t.start()
+    try:
+        deadline = time.time() + 5
+        while clock.blocked < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        assert clock.blocked == 5
+        # 低优先级请求没有提前预约时间槽，普通请求只需等待一个间隔
+        client._call_openai("fg")
+        assert clock.waits == pytest.approx([client.interval])
+        assert sent == ["fg"]
+    finally:
+        clock.release.set()
+        for t in threads:
+            t.join(5)
+    assert sent.count("bg") == 5